@@ -3,6 +3,7 @@
 
 Rules enforced:
 - no duplicate questions per year/text/options combination
+- optionally collapse near-duplicate rewordings (MinHash LSH), keeping the earliest year
 - preserve original wording/options
 - keep correct answer integrity
 - emit year-wise counts for validation
@@ -12,12 +13,35 @@ from __future__ import annotations
 
 import argparse
 import glob
-import json
 import hashlib
-from collections import Counter
+import os
+import random
+import re
+import zlib
+from collections import Counter, defaultdict
 from pathlib import Path
 from typing import Any
 
+import orjson
+
+JSON_WRITE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+
+_WORD_RE = re.compile(r"\w+")
+MINHASH_NUM_PERM = 128
+SHINGLE_WORDS = 3
+MINHASH_SEED = 1
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _draw_permutations() -> list[tuple[int, int]]:
+    # One fixed-seed stream keeps signatures, and therefore the built dataset,
+    # reproducible; drawing a and b in turn keeps the hash functions independent.
+    rng = random.Random(MINHASH_SEED)
+    return [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME)) for _ in range(MINHASH_NUM_PERM)]
+
+
+_PERMUTATIONS = _draw_permutations()
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build unified NORCET question dataset")
@@ -25,6 +49,12 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--input-glob", default="structured_json/*.json")
     parser.add_argument("--output", default="structured_json/final_questions.json")
     parser.add_argument("--report", default="structured_json/year_counts.json")
+    parser.add_argument(
+        "--near-dup-threshold",
+        type=float,
+        default=0.0,
+        help="Estimated Jaccard similarity above which questions are near-duplicates, e.g. 0.85 (default 0: off)",
+    )
     return parser.parse_args()
 
 
@@ -50,14 +80,25 @@ def normalize_options(raw: Any) -> dict[str, str]:
     return {}
 
 
-def stable_key(question: dict[str, Any]) -> str:
-    payload = {
-        "year": question.get("year"),
-        "question_text": str(question.get("question_text", "")).strip(),
-        "options": normalize_options(question.get("options", {})),
-    }
-    body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+def _update_field(hasher: Any, value: str) -> None:
+    data = value.encode("utf-8")
+    hasher.update(len(data).to_bytes(4, "little"))
+    hasher.update(data)
+
+
+def dedupe_key(question: dict[str, Any]) -> bytes:
+    """Exact-duplicate identity, shared with validate_dataset.
+
+    A 128-bit BLAKE2b digest over a length-prefixed canonical byte stream of
+    year, text and options A-D.
+    """
+    options = normalize_options(question.get("options", {}))
+    hasher = hashlib.blake2b(digest_size=16)
+    _update_field(hasher, str(question.get("year")))
+    _update_field(hasher, str(question.get("question_text", "")).strip())
+    for key in ("A", "B", "C", "D"):
+        _update_field(hasher, options.get(key, ""))
+    return hasher.digest()
 
 
 def normalize_answer(answer: Any, options: dict[str, str]) -> str:
@@ -83,48 +124,125 @@ def normalize_question(q: dict[str, Any]) -> dict[str, Any] | None:
     return normalized
 
 
+def _shingles(question: dict[str, Any]) -> set[int]:
+    options = question.get("options", {})
+    words = _WORD_RE.findall(" ".join([question.get("question_text", ""), *options.values()]).lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i : i + SHINGLE_WORDS]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def minhash_signature(shingles: set[int]) -> tuple[int, ...]:
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in shingles) for a, b in _PERMUTATIONS)
+
+
+def _lsh_bands(threshold: float) -> tuple[int, int]:
+    """Pick ``(bands, rows)`` whose LSH S-curve midpoint is closest to ``threshold``."""
+    splits = [(b, MINHASH_NUM_PERM // b) for b in range(1, MINHASH_NUM_PERM + 1) if MINHASH_NUM_PERM % b == 0]
+    return min(splits, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def drop_near_duplicates(questions: list[dict[str, Any]], threshold: float) -> tuple[list[dict[str, Any]], int]:
+    """Collapse near-duplicate questions with MinHash LSH.
+
+    Questions are visited earliest year first so the earliest occurrence is the
+    one kept; the returned list preserves the input order.
+    """
+    bands, rows = _lsh_bands(threshold)
+    buckets: list[defaultdict[tuple[int, ...], list[int]]] = [defaultdict(list) for _ in range(bands)]
+    signatures: dict[int, tuple[int, ...]] = {}
+    dropped: set[int] = set()
+
+    years = [q.get("year") for q in questions]
+    order = sorted(range(len(questions)), key=lambda i: (years[i] is None, years[i] or 0))
+    for idx in order:
+        signature = minhash_signature(_shingles(questions[idx]))
+        band_keys = [signature[b * rows : (b + 1) * rows] for b in range(bands)]
+
+        candidates = {other for b, key in enumerate(band_keys) for other in buckets[b].get(key, ())}
+        if any(
+            sum(x == y for x, y in zip(signature, signatures[other])) / MINHASH_NUM_PERM >= threshold
+            for other in candidates
+        ):
+            dropped.add(idx)
+            continue
+
+        signatures[idx] = signature
+        for b, key in enumerate(band_keys):
+            buckets[b][key].append(idx)
+
+    kept = [q for i, q in enumerate(questions) if i not in dropped]
+    return kept, len(dropped)
+
+
+def write_json_atomic(path: Path, payload: Any) -> None:
+    """Write JSON via a temp file + rename so readers never see a partial file."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(payload, option=JSON_WRITE_OPTIONS))
+    os.replace(tmp_path, path)
+
+
+def _file_ident(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_dev, st.st_ino
+
+
 def main() -> int:
     args = parse_args()
     root = args.root_dir
     input_paths = sorted(Path(p) for p in glob.glob(str(root / args.input_glob)))
     output_path = root / args.output
+    if output_path.exists():
+        # Compare by (device, inode) so the output is skipped however its path is spelled.
+        output_ident = _file_ident(output_path)
+        input_paths = [p for p in input_paths if _file_ident(p) != output_ident]
 
     all_questions: list[dict[str, Any]] = []
-    seen: set[str] = set()
+    seen: set[bytes] = set()
     duplicates = 0
 
     for path in input_paths:
-        if path.resolve() == output_path.resolve():
-            continue
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = orjson.loads(path.read_bytes())
         for question in extract_questions(payload):
             normalized = normalize_question(question)
             if not normalized:
                 continue
-            key = stable_key(normalized)
+            key = dedupe_key(normalized)
             if key in seen:
                 duplicates += 1
                 continue
             seen.add(key)
             all_questions.append(normalized)
 
+    near_duplicates = 0
+    if args.near_dup_threshold > 0:
+        all_questions, near_duplicates = drop_near_duplicates(all_questions, args.near_dup_threshold)
+
     year_counts = Counter(q.get("year") for q in all_questions if q.get("year") is not None)
 
     output_payload = {
         "count": len(all_questions),
         "duplicates_removed": duplicates,
+        "near_duplicates_removed": near_duplicates,
         "questions": all_questions,
     }
-    output_path.write_text(json.dumps(output_payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    write_json_atomic(output_path, output_payload)
 
     report_path = root / args.report
     report_payload = {
         "total_questions": len(all_questions),
+        "near_duplicates_removed": near_duplicates,
         "year_counts": {str(k): v for k, v in sorted(year_counts.items())},
     }
-    report_path.write_text(json.dumps(report_payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    write_json_atomic(report_path, report_payload)
 
-    print(f"Built dataset with {len(all_questions)} questions ({duplicates} duplicates removed)")
+    print(
+        f"Built dataset with {len(all_questions)} questions "
+        f"({duplicates} duplicates, {near_duplicates} near-duplicates removed)"
+    )
     print(f"Saved: {output_path}")
     print(f"Saved: {report_path}")
     return 0
@@ -13,20 +13,30 @@ from __future__ import annotations
 
 import argparse
 import hashlib
-import json
+import os
 import re
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import BinaryIO, Iterable
 from urllib.parse import unquote, urlparse
 
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 DEFAULT_TIMEOUT = 30
+DEFAULT_WORKERS = 8
+STREAM_CHUNK_SIZE = 64 * 1024
+YEAR_SNIFF_BYTES = 50000
+YEAR_QUICK_SNIFF_BYTES = 8192
 USER_AGENT = "Mozilla/5.0 (compatible; NORCET-Downloader/1.1)"
+ANCHOR_STRAINER = SoupStrainer("a", href=True)
 
 
 @dataclass
@@ -37,8 +47,22 @@ class DownloadResult:
     saved_path: str | None = None
 
 
+@dataclass
+class FetchedPdf:
+    temp_path: Path
+    digest: str
+    year: str
+    filename: str
+
+
 class NorcetDownloader:
-    def __init__(self, root_dir: Path, min_year: int = 2012, max_year: int | None = None) -> None:
+    def __init__(
+        self,
+        root_dir: Path,
+        min_year: int = 2012,
+        max_year: int | None = None,
+        pool_size: int = DEFAULT_WORKERS,
+    ) -> None:
         self.root_dir = root_dir
         self.raw_pdfs = root_dir / "raw_pdfs"
         self.logs_dir = root_dir / "logs"
@@ -52,24 +76,85 @@ class NorcetDownloader:
         self.hash_manifest_path = self.logs_dir / "hash_manifest.json"
         self.failure_log_path = self.logs_dir / "download_failures.log"
 
-        self.url_manifest = self._load_json(self.url_manifest_path)
-        self.hash_manifest = self._load_json(self.hash_manifest_path)
+        # Manifests are a JSON snapshot plus an append-only JSONL journal of
+        # entries added since; close() folds the journal back into the snapshot.
+        self.url_manifest = self._load_manifest(self.url_manifest_path)
+        self.hash_manifest = self._load_manifest(self.hash_manifest_path)
+        self._url_journal = self._open_journal(self.url_manifest_path)
+        self._hash_journal = self._open_journal(self.hash_manifest_path)
 
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     @staticmethod
     def _load_json(path: Path) -> dict:
         if path.exists():
             try:
-                return json.loads(path.read_text(encoding="utf-8"))
-            except json.JSONDecodeError:
+                return orjson.loads(path.read_bytes())
+            except orjson.JSONDecodeError:
                 return {}
         return {}
 
+    @staticmethod
+    def _journal_path(manifest_path: Path) -> Path:
+        return manifest_path.with_suffix(".jsonl")
+
+    @classmethod
+    def _load_manifest(cls, path: Path) -> dict:
+        manifest = cls._load_json(path)
+        journal = cls._journal_path(path)
+        if journal.exists():
+            with journal.open("rb") as handle:
+                for line in handle:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue  # torn final line from an interrupted run
+                    manifest[entry["key"]] = entry["value"]
+        return manifest
+
+    @classmethod
+    def _open_journal(cls, manifest_path: Path) -> BinaryIO:
+        handle = cls._journal_path(manifest_path).open("ab")
+        if handle.tell():
+            with cls._journal_path(manifest_path).open("rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                torn = existing.read(1) != b"\n"
+            if torn:
+                # Terminate a line torn by a crash so the next entry starts on
+                # its own line instead of being glued onto the unparseable tail.
+                handle.write(b"\n")
+        return handle
+
+    @staticmethod
+    def _append_journal(handle: BinaryIO, key: str, value: str) -> None:
+        handle.write(orjson.dumps({"key": key, "value": value}) + b"\n")
+        handle.flush()
+
     @staticmethod
     def _save_json(path: Path, data: dict) -> None:
-        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        # Write-and-rename so an interrupted run never leaves a truncated manifest.
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        """Compact the journals into the JSON manifests and release resources."""
+        for handle, path, data in (
+            (self._url_journal, self.url_manifest_path, self.url_manifest),
+            (self._hash_journal, self.hash_manifest_path, self.hash_manifest),
+        ):
+            handle.close()
+            self._save_json(path, data)
+            self._journal_path(path).unlink(missing_ok=True)
+        self.session.close()
 
     def _log_failure(self, result: DownloadResult) -> None:
         with self.failure_log_path.open("a", encoding="utf-8") as handle:
@@ -105,8 +190,33 @@ class NorcetDownloader:
         return self._safe_filename(candidate)
 
     @staticmethod
-    def _sha256_bytes(content: bytes) -> str:
-        return hashlib.sha256(content).hexdigest()
+    def _sha256_file(path: Path) -> str:
+        with path.open("rb") as handle:
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+
+    def _stream_to_temp(self, response: requests.Response) -> tuple[Path, str, bytes]:
+        """Write a streamed PDF body to a temp file, hashing it on the way.
+
+        Returns the temp path, the SHA-256 hex digest and the leading bytes
+        used for year detection.
+        """
+        self.raw_pdfs.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        head = bytearray()
+        with tempfile.NamedTemporaryFile(dir=self.raw_pdfs, suffix=".part", delete=False) as out:
+            try:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    if len(head) < YEAR_SNIFF_BYTES:
+                        head.extend(chunk[: YEAR_SNIFF_BYTES - len(head)])
+            except BaseException:
+                out.close()
+                os.unlink(out.name)
+                raise
+        # NamedTemporaryFile creates 0600 files; saved PDFs should stay readable.
+        os.chmod(out.name, 0o644)
+        return Path(out.name), hasher.hexdigest(), bytes(head)
 
     def _detect_year(self, url: str, response: requests.Response, content: bytes) -> str | None:
         year = self._extract_year(url)
@@ -118,8 +228,13 @@ class NorcetDownloader:
         if year:
             return year
 
+        # Cheap raw-bytes scan of the head before paying for a full HTML parse.
+        year = self._extract_year(content[:YEAR_QUICK_SNIFF_BYTES].decode("utf-8", errors="ignore"))
+        if year:
+            return year
+
         if "text/html" in response.headers.get("Content-Type", "").lower():
-            soup = BeautifulSoup(content, "html.parser")
+            soup = BeautifulSoup(content, "lxml")
             text_blob = " ".join(
                 filter(None, [soup.title.string if soup.title else "", soup.get_text(" ", strip=True)])
             )
@@ -132,64 +247,106 @@ class NorcetDownloader:
                 if year:
                     return year
 
-        return self._extract_year(content[:50000].decode("utf-8", errors="ignore"))
+        return self._extract_year(content[:YEAR_SNIFF_BYTES].decode("utf-8", errors="ignore"))
+
+    def _get_streamed(self, url: str) -> requests.Response:
+        """GET ``url`` without reading the body.
+
+        Streamed responses hold their pooled connection until read or closed,
+        so every error path closes the response before raising.
+        """
+        response = self.session.get(url, timeout=DEFAULT_TIMEOUT, allow_redirects=True, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
 
-    def _resolve_pdf(self, url: str) -> tuple[requests.Response, bytes, str]:
-        response = self.session.get(url, timeout=DEFAULT_TIMEOUT, allow_redirects=True)
-        response.raise_for_status()
+    def _resolve_pdf(self, url: str) -> requests.Response:
+        """Return a streamed (not yet read) response for the PDF behind ``url``."""
+        response = self._get_streamed(url)
 
         if self._is_pdf_response(response):
-            return response, response.content, response.url
+            return response
 
-        ctype = response.headers.get("Content-Type", "").lower()
-        if "text/html" not in ctype:
-            raise ValueError(f"URL did not return PDF/HTML (Content-Type: {ctype or 'unknown'})")
+        with response:
+            ctype = response.headers.get("Content-Type", "").lower()
+            if "text/html" not in ctype:
+                raise ValueError(f"URL did not return PDF/HTML (Content-Type: {ctype or 'unknown'})")
 
-        soup = BeautifulSoup(response.content, "html.parser")
-        pdf_links: list[str] = []
-        for anchor in soup.find_all("a", href=True):
-            href = anchor["href"].strip()
-            if ".pdf" in href.lower():
-                pdf_links.append(requests.compat.urljoin(response.url, href))
+            # Only anchors matter here, so skip building the rest of the tree.
+            soup = BeautifulSoup(response.content, "lxml", parse_only=ANCHOR_STRAINER)
+            # Only the first PDF link is followed, so stop scanning once it is found.
+            pdf_link: str | None = None
+            for anchor in soup.find_all("a", href=True):
+                href = anchor["href"].strip()
+                if ".pdf" in href.lower():
+                    pdf_link = requests.compat.urljoin(response.url, href)
+                    break
 
-        if not pdf_links:
+        if pdf_link is None:
             raise ValueError("No PDF links found on HTML page")
 
-        pdf_response = self.session.get(pdf_links[0], timeout=DEFAULT_TIMEOUT, allow_redirects=True)
-        pdf_response.raise_for_status()
+        pdf_response = self._get_streamed(pdf_link)
         if not self._is_pdf_response(pdf_response):
+            pdf_response.close()
             raise ValueError("Resolved file is not a PDF")
 
-        return pdf_response, pdf_response.content, pdf_response.url
+        return pdf_response
 
-    def download(self, url: str) -> DownloadResult:
+    def precheck(self, url: str) -> tuple[str, DownloadResult | None]:
+        """Normalize ``url`` and return a skip result if it needs no download."""
         normalized = url.strip()
         if not normalized:
-            return DownloadResult(url=url, status="skipped", message="Empty URL")
-
+            return normalized, DownloadResult(url=url, status="skipped", message="Empty URL")
         if normalized in self.url_manifest:
-            return DownloadResult(
+            return normalized, DownloadResult(
                 url=normalized,
                 status="skipped",
                 message=f"Already downloaded: {self.url_manifest[normalized]}",
             )
+        return normalized, None
 
-        try:
-            response, content, source_url = self._resolve_pdf(normalized)
-            digest = self._sha256_bytes(content)
-
-            if digest in self.hash_manifest:
-                existing = self.hash_manifest[digest]
-                self.url_manifest[normalized] = existing
-                self._save_json(self.url_manifest_path, self.url_manifest)
-                return DownloadResult(url=normalized, status="skipped", message=f"Duplicate file hash: {existing}")
+    def fetch(self, url: str) -> FetchedPdf:
+        """Network half of a download: resolve, stream to a temp file, detect year and name.
 
-            year = self._detect_year(source_url, response, content) or "unknown"
-            target_dir = self.raw_pdfs / year
+        Touches no shared state, so it is safe to run on worker threads.
+        """
+        response = self._resolve_pdf(url)
+        source_url = response.url
+        with response:
+            temp_path, digest, head = self._stream_to_temp(response)
+        try:
+            year = self._detect_year(source_url, response, head) or "unknown"
+            filename = self._filename_from_response(response, source_url)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return FetchedPdf(temp_path=temp_path, digest=digest, year=year, filename=filename)
+
+    def store(self, url: str, fetched: FetchedPdf) -> DownloadResult:
+        """Bookkeeping half of a download: dedupe, name the file and record it in the manifests.
+
+        Runs on the calling thread; callers store results in input order so
+        naming and duplicate resolution do not depend on network timing.
+        """
+        try:
+            if url in self.url_manifest:
+                return DownloadResult(
+                    url=url, status="skipped", message=f"Already downloaded: {self.url_manifest[url]}"
+                )
+            if fetched.digest in self.hash_manifest:
+                existing = self.hash_manifest[fetched.digest]
+                self.url_manifest[url] = existing
+                self._append_journal(self._url_journal, url, existing)
+                return DownloadResult(url=url, status="skipped", message=f"Duplicate file hash: {existing}")
+
+            target_dir = self.raw_pdfs / fetched.year
             target_dir.mkdir(parents=True, exist_ok=True)
 
-            target = target_dir / self._filename_from_response(response, source_url)
-            if target.exists() and self._sha256_bytes(target.read_bytes()) != digest:
+            target = target_dir / fetched.filename
+            if target.exists() and self._sha256_file(target) != fetched.digest:
                 counter = 1
                 while True:
                     candidate = target_dir / f"{target.stem}_{counter}{target.suffix}"
@@ -198,19 +355,31 @@ class NorcetDownloader:
                         break
                     counter += 1
 
-            target.write_bytes(content)
+            os.replace(fetched.temp_path, target)
             rel_path = str(target.relative_to(self.root_dir))
 
-            self.url_manifest[normalized] = rel_path
-            self.hash_manifest[digest] = rel_path
-            self._save_json(self.url_manifest_path, self.url_manifest)
-            self._save_json(self.hash_manifest_path, self.hash_manifest)
+            self.url_manifest[url] = rel_path
+            self.hash_manifest[fetched.digest] = rel_path
+            self._append_journal(self._url_journal, url, rel_path)
+            self._append_journal(self._hash_journal, fetched.digest, rel_path)
+        finally:
+            fetched.temp_path.unlink(missing_ok=True)
+
+        return DownloadResult(url=url, status="ok", message="Downloaded", saved_path=rel_path)
 
-            return DownloadResult(url=normalized, status="ok", message="Downloaded", saved_path=rel_path)
+    def fail(self, url: str, exc: Exception) -> DownloadResult:
+        result = DownloadResult(url=url, status="failed", message=str(exc))
+        self._log_failure(result)
+        return result
+
+    def download(self, url: str) -> DownloadResult:
+        normalized, skipped = self.precheck(url)
+        if skipped:
+            return skipped
+        try:
+            return self.store(normalized, self.fetch(normalized))
         except Exception as exc:  # noqa: BLE001
-            result = DownloadResult(url=normalized, status="failed", message=str(exc))
-            self._log_failure(result)
-            return result
+            return self.fail(normalized, exc)
 
 
 def load_urls(url_file: Path | None, cli_urls: list[str]) -> list[str]:
@@ -244,6 +413,7 @@ def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument("--min-year", type=int, default=2012, help="Minimum expected exam year")
     parser.add_argument("--max-year", type=int, default=datetime.now().year, help="Maximum expected exam year")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent download threads")
     return parser.parse_args(argv)
 
 
@@ -254,21 +424,44 @@ def main(argv: Iterable[str] | None = None) -> int:
         print("No URLs provided. Use --url-file or positional URLs.", file=sys.stderr)
         return 1
 
-    downloader = NorcetDownloader(args.root_dir, min_year=args.min_year, max_year=args.max_year)
+    workers = max(1, args.workers)
+    downloader = NorcetDownloader(
+        args.root_dir,
+        min_year=args.min_year,
+        max_year=args.max_year,
+        pool_size=workers,
+    )
     print(f"Processing {len(urls)} URL(s)...")
 
     ok = skipped = failed = 0
-    for url in urls:
-        result = downloader.download(url)
-        if result.status == "ok":
-            ok += 1
-            print(f"[OK] {url} -> {result.saved_path}")
-        elif result.status == "skipped":
-            skipped += 1
-            print(f"[SKIP] {url} ({result.message})")
-        else:
-            failed += 1
-            print(f"[FAIL] {url} ({result.message})")
+    try:
+        # Fetches run on worker threads; results are stored on this thread in
+        # input order, so manifests and file naming need no locking and do not
+        # depend on which download finishes first.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            jobs = []
+            for url in urls:
+                normalized, result = downloader.precheck(url)
+                future = None if result else executor.submit(downloader.fetch, normalized)
+                jobs.append((url, normalized, result, future))
+
+            for url, normalized, result, future in jobs:
+                if future is not None:
+                    try:
+                        result = downloader.store(normalized, future.result())
+                    except Exception as exc:  # noqa: BLE001
+                        result = downloader.fail(normalized, exc)
+                if result.status == "ok":
+                    ok += 1
+                    print(f"[OK] {url} -> {result.saved_path}")
+                elif result.status == "skipped":
+                    skipped += 1
+                    print(f"[SKIP] {url} ({result.message})")
+                else:
+                    failed += 1
+                    print(f"[FAIL] {url} ({result.message})")
+    finally:
+        downloader.close()
 
     print(f"\nSummary: ok={ok}, skipped={skipped}, failed={failed}")
     if failed:
@@ -8,123 +8,161 @@ extracted_text/{year}.txt.
 from __future__ import annotations
 
 import argparse
+import os
 import re
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import fitz  # PyMuPDF
 
-MAX_HEADER_FOOTER_LINES = 3
+# Text blocks lying wholly within this fraction of the page height from the top
+# or bottom edge are treated as header/footer candidates.
+MARGIN_BAND_RATIO = 0.08
 
+_WS_RE = re.compile(r"\s+")
+# Page labels / isolated page numbers, or decorative separator lines.
+_NOISE_LINE_RE = re.compile(r"(?:page\s*)?\d{1,4}(?:\s*/\s*\d{1,4})?|[-_=~•·.\s]{3,}")
+_WATERMARK_RE = re.compile(r"memory based|not for sale|copyright|www\.")
 
-class PdfYearExtractor:
-    def __init__(self, root_dir: Path) -> None:
-        self.root_dir = root_dir
-        self.raw_pdfs_dir = root_dir / "raw_pdfs"
-        self.extracted_dir = root_dir / "extracted_text"
-        self.extracted_dir.mkdir(parents=True, exist_ok=True)
 
-    @staticmethod
-    def _normalize_line(line: str) -> str:
-        line = re.sub(r"\s+", " ", line).strip()
-        return line
+def _normalize_line(line: str) -> str:
+    return _WS_RE.sub(" ", line).strip()
 
-    @staticmethod
-    def _is_noise_line(line: str) -> bool:
-        if not line:
-            return True
 
-        compact = line.strip()
-        lower = compact.lower()
+def _is_noise_line(line: str) -> bool:
+    if not line:
+        return True
 
-        # Page labels / isolated page numbers.
-        if re.fullmatch(r"(?:page\s*)?\d{1,4}(?:\s*/\s*\d{1,4})?", lower):
-            return True
+    compact = line.strip()
+    lower = compact.lower()
 
-        # Common watermark-like text.
-        if any(token in lower for token in ("memory based", "not for sale", "copyright", "www.")):
-            return True
+    # Page labels and decorative separators share one compiled pattern.
+    if _NOISE_LINE_RE.fullmatch(lower):
+        return True
 
-        # Decorative separators / short symbol lines.
-        if re.fullmatch(r"[-_=~•·.\s]{3,}", compact):
+    # Common watermark-like text.
+    if _WATERMARK_RE.search(lower):
+        return True
+
+    # Heuristic for all-caps/spaced watermark artifacts. The cheap length and
+    # spacing checks run first; letters are then counted with C-level map().
+    if len(compact) <= 60 and compact.count(" ") > 4:
+        alpha_count = sum(map(str.isalpha, compact))
+        if alpha_count and sum(map(str.isupper, compact)) / alpha_count > 0.9:
             return True
 
-        # Heuristic for all-caps/spaced watermark artifacts.
-        alpha_chars = [c for c in compact if c.isalpha()]
-        if alpha_chars:
-            uppercase_ratio = sum(1 for c in alpha_chars if c.isupper()) / len(alpha_chars)
-            if uppercase_ratio > 0.9 and len(compact) <= 60 and compact.count(" ") > 4:
-                return True
+    return False
+
+
+def _collect_repeated_margin_lines(page_margins: list[list[str]]) -> set[str]:
+    candidates = [line for margin in page_margins for line in margin]
+    if not candidates:
+        return set()
+
+    counts = Counter(candidates)
+    min_occurrences = max(2, int(len(page_margins) * 0.5))
+    return {line for line, count in counts.items() if count >= min_occurrences}
 
-        return False
 
-    def _collect_repeated_margin_lines(self, page_lines: list[list[str]]) -> set[str]:
-        candidates: list[str] = []
-        for lines in page_lines:
-            if not lines:
+def _read_page(page: fitz.Page) -> tuple[list[tuple[str, str]], list[str]]:
+    """Return ``(line, lowercase)`` pairs for a page plus its margin-band lines.
+
+    Uses PyMuPDF's block layout so headers/footers are found by position on
+    the page rather than by guessing a fixed number of leading/trailing lines.
+    """
+    height = page.rect.height
+    top_limit = height * MARGIN_BAND_RATIO
+    bottom_limit = height * (1 - MARGIN_BAND_RATIO)
+
+    lines: list[tuple[str, str]] = []
+    margin: list[str] = []
+    for _x0, y0, _x1, y1, text, _block_no, block_type in page.get_text("blocks"):
+        if block_type != 0:
+            continue
+        in_margin = y1 < top_limit or y0 > bottom_limit
+        for raw_line in text.splitlines():
+            line = _normalize_line(raw_line)
+            if not line:
                 continue
-            top = lines[:MAX_HEADER_FOOTER_LINES]
-            bottom = lines[-MAX_HEADER_FOOTER_LINES:] if len(lines) > MAX_HEADER_FOOTER_LINES else []
-            candidates.extend(top)
-            candidates.extend(bottom)
-
-        normalized = [self._normalize_line(line).lower() for line in candidates if self._normalize_line(line)]
-        if not normalized:
-            return set()
-
-        counts = Counter(normalized)
-        min_occurrences = max(2, int(len(page_lines) * 0.5))
-        return {line for line, count in counts.items() if count >= min_occurrences}
-
-    def _extract_pdf_clean_text(self, pdf_path: Path) -> str:
-        doc = fitz.open(pdf_path)
-        try:
-            pages_raw_lines: list[list[str]] = []
-            for page in doc:
-                text = page.get_text("text")
-                lines = [self._normalize_line(ln) for ln in text.splitlines()]
-                lines = [ln for ln in lines if ln]
-                pages_raw_lines.append(lines)
-
-            repeated_margin_lines = self._collect_repeated_margin_lines(pages_raw_lines)
-
-            cleaned_pages: list[str] = []
-            for lines in pages_raw_lines:
-                kept_lines: list[str] = []
-                for line in lines:
-                    norm_lower = self._normalize_line(line).lower()
-                    if norm_lower in repeated_margin_lines:
-                        continue
-                    if self._is_noise_line(line):
-                        continue
-                    kept_lines.append(line)
-
-                page_text = "\n".join(kept_lines).strip()
-                if page_text:
-                    cleaned_pages.append(page_text)
-
-            return "\n\n".join(cleaned_pages).strip()
-        finally:
-            doc.close()
+            lower = line.lower()
+            lines.append((line, lower))
+            if in_margin:
+                margin.append(lower)
+    return lines, margin
+
+
+def extract_pdf_clean_text(pdf_path: Path) -> str:
+    """Return the cleaned text of one PDF.
+
+    Kept at module level so it can be shipped to worker processes.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        # Lines are normalized once here and carried with their lowercase form,
+        # so margin detection and filtering below never re-normalize them.
+        pages_raw_lines: list[list[tuple[str, str]]] = []
+        page_margins: list[list[str]] = []
+        for page in doc:
+            lines, margin = _read_page(page)
+            pages_raw_lines.append(lines)
+            page_margins.append(margin)
+
+        repeated_margin_lines = _collect_repeated_margin_lines(page_margins)
+
+        cleaned_pages: list[str] = []
+        for lines in pages_raw_lines:
+            kept_lines: list[str] = []
+            for line, norm_lower in lines:
+                if norm_lower in repeated_margin_lines:
+                    continue
+                if _is_noise_line(line):
+                    continue
+                kept_lines.append(line)
+
+            page_text = "\n".join(kept_lines).strip()
+            if page_text:
+                cleaned_pages.append(page_text)
+
+        return "\n\n".join(cleaned_pages).strip()
+    finally:
+        doc.close()
+
+
+class PdfYearExtractor:
+    def __init__(self, root_dir: Path, workers: int | None = None) -> None:
+        self.root_dir = root_dir
+        self.raw_pdfs_dir = root_dir / "raw_pdfs"
+        self.extracted_dir = root_dir / "extracted_text"
+        self.extracted_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
 
     def run(self) -> None:
         if not self.raw_pdfs_dir.exists():
             raise FileNotFoundError(f"Missing raw PDFs directory: {self.raw_pdfs_dir}")
 
         year_dirs = sorted(path for path in self.raw_pdfs_dir.iterdir() if path.is_dir())
+        jobs: list[tuple[Path, Path]] = []
         for year_dir in year_dirs:
-            pdf_files = sorted(year_dir.glob("*.pdf"))
-            if not pdf_files:
-                continue
-
-            blocks: list[str] = []
-            for pdf_file in pdf_files:
-                cleaned_text = self._extract_pdf_clean_text(pdf_file)
-                if not cleaned_text:
-                    continue
-
-                blocks.append(f"### FILE: {pdf_file.name}\n\n{cleaned_text}")
-
+            jobs.extend((year_dir, pdf_file) for pdf_file in sorted(year_dir.glob("*.pdf")))
+        if not jobs:
+            return
+
+        # PDF parsing is CPU-bound native work, so fan files out across processes
+        # and assemble the per-year blocks back in their original order. PyMuPDF
+        # is not thread-safe, so pages are not split further; instead the largest
+        # files are submitted first so one big paper does not finish last alone.
+        blocks_by_year: dict[Path, list[str]] = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            by_size = sorted(jobs, key=lambda job: job[1].stat().st_size, reverse=True)
+            futures = {pdf_file: executor.submit(extract_pdf_clean_text, pdf_file) for _, pdf_file in by_size}
+            for year_dir, pdf_file in jobs:
+                blocks = blocks_by_year.setdefault(year_dir, [])
+                cleaned_text = futures[pdf_file].result()
+                if cleaned_text:
+                    blocks.append(f"### FILE: {pdf_file.name}\n\n{cleaned_text}")
+
+        for year_dir, blocks in blocks_by_year.items():
             output_path = self.extracted_dir / f"{year_dir.name}.txt"
             output_path.write_text("\n\n".join(blocks).strip() + "\n", encoding="utf-8")
             print(f"Saved: {output_path.relative_to(self.root_dir)}")
@@ -138,12 +176,18 @@ def parse_args() -> argparse.Namespace:
         default=Path(__file__).resolve().parents[1],
         help="Repository root containing raw_pdfs/ and extracted_text/",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for PDF extraction (defaults to CPU count)",
+    )
     return parser.parse_args()
 
 
 def main() -> int:
     args = parse_args()
-    extractor = PdfYearExtractor(root_dir=args.root_dir)
+    extractor = PdfYearExtractor(root_dir=args.root_dir, workers=args.workers)
     extractor.run()
     return 0
 
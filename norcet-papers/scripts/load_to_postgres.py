@@ -8,15 +8,33 @@ import hashlib
 import json
 from pathlib import Path
 
+import orjson
 import psycopg
 
+COLUMNS = (
+    "question_hash",
+    "year",
+    "subject",
+    "topic",
+    "subtopic",
+    "question_text",
+    "option_a",
+    "option_b",
+    "option_c",
+    "option_d",
+    "correct_answer",
+    "explanation",
+    "source_pdf",
+    "source_file",
+)
+COLUMN_TYPES = ["text", "int4"] + ["text"] * (len(COLUMNS) - 2)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Load NORCET dataset to PostgreSQL")
     parser.add_argument("--root-dir", type=Path, default=Path(__file__).resolve().parents[1])
     parser.add_argument("--input", default="structured_json/final_questions.json")
     parser.add_argument("--database-url", required=True)
-    parser.add_argument("--batch-size", type=int, default=500)
     return parser.parse_args()
 
 
@@ -29,27 +47,42 @@ def q_hash(question: dict) -> str:
     return hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
 
 
-def chunks(items: list[dict], size: int):
-    for i in range(0, len(items), size):
-        yield items[i : i + size]
+def to_row(q: dict) -> tuple:
+    options = q.get("options", {})
+    return (
+        q_hash(q),
+        q.get("year"),
+        q.get("subject", "Unknown"),
+        q.get("topic", "Unknown"),
+        q.get("subtopic", "Unknown"),
+        q.get("question_text", ""),
+        options.get("A", ""),
+        options.get("B", ""),
+        options.get("C", ""),
+        options.get("D", ""),
+        q.get("correct_answer", "A"),
+        q.get("explanation", ""),
+        q.get("source_pdf", ""),
+        q.get("source_file", ""),
+    )
 
 
 def main() -> int:
     args = parse_args()
     in_file = args.root_dir / args.input
-    payload = json.loads(in_file.read_text(encoding="utf-8"))
+    payload = orjson.loads(in_file.read_bytes())
     questions = payload.get("questions", [])
 
-    sql = """
-    INSERT INTO questions (
-      question_hash, year, subject, topic, subtopic, question_text,
-      option_a, option_b, option_c, option_d, correct_answer,
-      explanation, source_pdf, source_file
-    ) VALUES (
-      %(question_hash)s, %(year)s, %(subject)s, %(topic)s, %(subtopic)s, %(question_text)s,
-      %(option_a)s, %(option_b)s, %(option_c)s, %(option_d)s, %(correct_answer)s,
-      %(explanation)s, %(source_pdf)s, %(source_file)s
-    )
+    column_list = ", ".join(COLUMNS)
+    copy_sql = f"COPY questions_staging ({column_list}, ordinal) FROM STDIN (FORMAT BINARY)"
+    # DISTINCT ON keeps a single staged row per hash, since ON CONFLICT cannot
+    # touch the same target row twice in one statement. Ordering by input
+    # position keeps the last occurrence, as a per-row upsert would.
+    upsert_sql = f"""
+    INSERT INTO questions ({column_list})
+    SELECT DISTINCT ON (question_hash) {column_list}
+    FROM questions_staging
+    ORDER BY question_hash, ordinal DESC
     ON CONFLICT (question_hash) DO UPDATE SET
       subject = EXCLUDED.subject,
       topic = EXCLUDED.topic,
@@ -61,33 +94,19 @@ def main() -> int:
     """
 
     with psycopg.connect(args.database_url) as conn:
+        # The whole load is three statements (stage, COPY, upsert); psycopg's
+        # pipeline mode cannot wrap COPY and there is nothing left to prepare.
         with conn.cursor() as cur:
+            cur.execute(
+                "CREATE TEMP TABLE questions_staging (LIKE questions INCLUDING DEFAULTS, ordinal int4) ON COMMIT DROP"
+            )
             total = 0
-            for batch in chunks(questions, args.batch_size):
-                rows = []
-                for q in batch:
-                    options = q.get("options", {})
-                    rows.append(
-                        {
-                            "question_hash": q_hash(q),
-                            "year": q.get("year"),
-                            "subject": q.get("subject", "Unknown"),
-                            "topic": q.get("topic", "Unknown"),
-                            "subtopic": q.get("subtopic", "Unknown"),
-                            "question_text": q.get("question_text", ""),
-                            "option_a": options.get("A", ""),
-                            "option_b": options.get("B", ""),
-                            "option_c": options.get("C", ""),
-                            "option_d": options.get("D", ""),
-                            "correct_answer": q.get("correct_answer", "A"),
-                            "explanation": q.get("explanation", ""),
-                            "source_pdf": q.get("source_pdf", ""),
-                            "source_file": q.get("source_file", ""),
-                        }
-                    )
-
-                cur.executemany(sql, rows)
-                total += len(rows)
+            with cur.copy(copy_sql) as copy:
+                copy.set_types([*COLUMN_TYPES, "int4"])
+                for q in questions:
+                    copy.write_row((*to_row(q), total))
+                    total += 1
+            cur.execute(upsert_sql)
             conn.commit()
 
     print(f"Upserted {total} question rows into PostgreSQL")
@@ -4,15 +4,19 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
 import uuid
 from dataclasses import dataclass
+from itertools import chain, islice
 from pathlib import Path
-from typing import Iterable
 
-QUESTION_Q_RE = re.compile(r"^\s*q(?:uestion)?\s*(\d{1,3})\s*[\).:-]\s*(.*)$", re.IGNORECASE)
-QUESTION_NUM_RE = re.compile(r"^\s*(\d{1,3})\s*[\.:-]\s*(.*)$")
+import orjson
+
+# "Q12)" / "Question 12." or a bare "12." heading, matched in one call per line.
+QUESTION_RE = re.compile(
+    r"^\s*(?:q(?:uestion)?\s*(\d{1,3})\s*[\).:-]|(\d{1,3})\s*[\.:-])\s*(?P<text>.*)$",
+    re.IGNORECASE,
+)
 OPTION_ALPHA_RE = re.compile(r"^\s*[\(\[]?([A-D])[\)\].:-]\s*(.*)$", re.IGNORECASE)
 OPTION_NUM_RE = re.compile(r"^\s*([1-4])[\).:-]\s*(.*)$")
 INLINE_OPTIONS_RE = re.compile(r"[\(\[]?([A-D])[\)\]]\s*[:.-]?\s*(.*?)(?=(?:\s+[\(\[]?[A-D][\)\]])|$)", re.IGNORECASE)
@@ -26,13 +30,23 @@ TOPIC_RE = re.compile(r"^\s*topic\s*[:\-]\s*(.+)$", re.IGNORECASE)
 SUBTOPIC_RE = re.compile(r"^\s*subtopic\s*[:\-]\s*(.+)$", re.IGNORECASE)
 
 OPTION_MAP = {"1": "A", "2": "B", "3": "C", "4": "D"}
-NOISE_PATTERNS = (
-    re.compile(r"https?://", re.IGNORECASE),
-    re.compile(r"\b(?:telegram|whatsapp|instagram|facebook|youtube)\b", re.IGNORECASE),
-    re.compile(r"\b(?:subscribe|follow us|join (?:our )?channel|download app)\b", re.IGNORECASE),
-    re.compile(r"\b(?:copyright|all rights reserved|not for sale|memory based)\b", re.IGNORECASE),
-    re.compile(r"^\s*page\s*\d+(?:\s*/\s*\d+)?\s*$", re.IGNORECASE),
+NOISE_RE = re.compile(
+    r"https?://"
+    r"|\b(?:telegram|whatsapp|instagram|facebook|youtube"
+    r"|subscribe|follow us|join (?:our )?channel|download app"
+    r"|copyright|all rights reserved|not for sale|memory based)\b"
+    r"|^\s*page\s*\d+(?:\s*/\s*\d+)?\s*$",
+    re.IGNORECASE,
 )
+SEPARATOR_RE = re.compile(r"[-_=~.•·\s]{3,}")
+# Lines are normalized before classification, so these are the only possible
+# first characters of a subject/topic/subtopic line (\u017f folds to "s").
+METADATA_FIRST_CHARS = frozenset("sStT\u017f")
+# Block lines are stripped, so each anchored pattern can only match lines
+# starting with one of these characters.
+EXPLANATION_FIRST_CHARS = frozenset("eErR")
+OPTION_ALPHA_FIRST_CHARS = frozenset("([aAbBcCdD")
+OPTION_NUM_FIRST_CHARS = frozenset("1234")
 
 
 @dataclass
@@ -49,19 +63,16 @@ class McqParser:
 
     @staticmethod
     def _normalize_line(line: str) -> str:
-        line = line.replace("\u00a0", " ")
-        return re.sub(r"\s+", " ", line).strip()
+        # str.split() already treats NBSP and every other Unicode space as a
+        # separator, so one split/join replaces the replace + sub + strip chain.
+        return " ".join(line.split())
 
     def _is_noise_line(self, line: str) -> bool:
         if not line:
             return True
-        if re.fullmatch(r"[-_=~.•·\s]{3,}", line):
+        if SEPARATOR_RE.fullmatch(line):
             return True
-        return any(pattern.search(line) for pattern in NOISE_PATTERNS)
-
-    def _clean_lines(self, text: str) -> list[str]:
-        lines = [self._normalize_line(ln) for ln in text.splitlines()]
-        return [ln for ln in lines if not self._is_noise_line(ln)]
+        return NOISE_RE.search(line) is not None
 
     @staticmethod
     def _extract_sections(raw_text: str) -> list[tuple[str, str]]:
@@ -75,61 +86,94 @@ class McqParser:
             sections.append((source, body))
         return sections
 
-    def _split_question_blocks(self, lines: Iterable[str]) -> list[list[str]]:
-        blocks: list[list[str]] = []
-        current: list[str] = []
-        for line in lines:
-            if QUESTION_Q_RE.match(line) or QUESTION_NUM_RE.match(line):
-                if current:
-                    blocks.append(current)
-                current = [line]
-            elif current:
-                current.append(line)
-        if current:
-            blocks.append(current)
-        return blocks
+    def _scan_section(self, body: str) -> tuple[list[str], list[tuple[int, int]], tuple[str, str, str]]:
+        """Clean, read metadata and find question spans in one pass over the lines.
+
+        Cheap first-character checks keep most body lines away from the
+        metadata and question-heading regexes. Metadata is last-wins and
+        applies to the whole section. Questions are returned as (start, end)
+        spans into the cleaned lines rather than copied blocks.
+        """
+        subject, topic, subtopic = self.defaults.subject, self.defaults.topic, self.defaults.subtopic
+        lines: list[str] = []
+        starts: list[int] = []
+        normalize = self._normalize_line
+        is_noise = self._is_noise_line
+        for raw_line in body.splitlines():
+            line = normalize(raw_line)
+            if is_noise(line):
+                continue
 
-    @staticmethod
-    def _detect_metadata(lines: list[str], defaults: ParseDefaults) -> tuple[str, str, str]:
-        subject, topic, subtopic = defaults.subject, defaults.topic, defaults.subtopic
-        for line in lines:
-            if match := SUBJECT_RE.match(line):
-                subject = match.group(1).strip()
-            elif match := TOPIC_RE.match(line):
-                topic = match.group(1).strip()
-            elif match := SUBTOPIC_RE.match(line):
-                subtopic = match.group(1).strip()
-        return subject, topic, subtopic
+            first = line[0]
+            if first in METADATA_FIRST_CHARS:
+                if match := SUBJECT_RE.match(line):
+                    subject = match.group(1).strip()
+                elif match := TOPIC_RE.match(line):
+                    topic = match.group(1).strip()
+                elif match := SUBTOPIC_RE.match(line):
+                    subtopic = match.group(1).strip()
+            elif (first == "q" or first == "Q" or first.isdecimal()) and QUESTION_RE.match(line):
+                starts.append(len(lines))
+
+            # Lines before the first question heading never belong to a block.
+            if starts:
+                lines.append(line)
+        spans = list(zip(starts, starts[1:] + [len(lines)]))
+        return lines, spans, (subject, topic, subtopic)
+
+    def _question_id(self, source_pdf: str, ordinal: int, question_text: str, options: dict[str, str]) -> str:
+        """Content-derived UUID, so re-parsing the same text yields the same ids.
+
+        ``ordinal`` is the question's position within its source PDF, so
+        repeated questions in one paper still get distinct ids.
+        """
+        key = "\x1f".join(
+            [source_pdf, str(self.defaults.year), str(ordinal), question_text, *chain.from_iterable(options.items())]
+        )
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
 
     def _parse_question_block(
         self,
-        block: list[str],
+        lines: list[str],
+        start: int,
+        end: int,
         source_pdf: str,
         subject: str,
         topic: str,
         subtopic: str,
+        ordinal: int,
     ) -> dict | None:
-        head_match = QUESTION_Q_RE.match(block[0]) or QUESTION_NUM_RE.match(block[0])
+        head_match = QUESTION_RE.match(lines[start])
         if not head_match:
             return None
 
-        question_bits: list[str] = [head_match.group(2).strip()] if head_match.group(2).strip() else []
+        head_text = head_match.group("text").strip()
+        question_bits: list[str] = [head_text] if head_text else []
         options: dict[str, str] = {}
         current_option: str | None = None
         explanation_parts: list[str] = []
         answer: str = ""
 
-        for raw_line in block[1:]:
+        answer_search = ANSWER_RE.search
+        explanation_match = EXPLANATION_RE.match
+        alpha_match = OPTION_ALPHA_RE.match
+        numeric_match = OPTION_NUM_RE.match
+        inline_finditer = INLINE_OPTIONS_RE.finditer
+
+        for raw_line in islice(lines, start + 1, end):
             line = raw_line.strip()
             if not line:
                 continue
 
-            if match := ANSWER_RE.search(line):
+            # casefold() also folds the "\u017f" / "\u212a" variants IGNORECASE accepts.
+            folded = line.casefold()
+            if ("ans" in folded or "key" in folded) and (match := answer_search(line)):
                 raw_answer = match.group(1).upper()
                 answer = OPTION_MAP.get(raw_answer, raw_answer)
                 continue
 
-            if match := EXPLANATION_RE.match(line):
+            first = line[0]
+            if first in EXPLANATION_FIRST_CHARS and (match := explanation_match(line)):
                 explanation_parts.append(match.group(1).strip())
                 current_option = None
                 continue
@@ -138,20 +182,20 @@ class McqParser:
                 explanation_parts.append(line)
                 continue
 
-            if alpha := OPTION_ALPHA_RE.match(line):
+            if first in OPTION_ALPHA_FIRST_CHARS and (alpha := alpha_match(line)):
                 key = alpha.group(1).upper()
                 options[key] = alpha.group(2).strip()
                 current_option = key
                 continue
 
-            if numeric := OPTION_NUM_RE.match(line):
+            if first in OPTION_NUM_FIRST_CHARS and (numeric := numeric_match(line)):
                 key = OPTION_MAP[numeric.group(1)]
                 options[key] = numeric.group(2).strip()
                 current_option = key
                 continue
 
-            inline_found = list(INLINE_OPTIONS_RE.finditer(line))
-            if inline_found and len(inline_found) >= 2:
+            inline_found = list(inline_finditer(line)) if ")" in line or "]" in line else []
+            if len(inline_found) >= 2:
                 for m in inline_found:
                     options[m.group(1).upper()] = m.group(2).strip(" ;")
                 current_option = None
@@ -166,13 +210,14 @@ class McqParser:
             return None
 
         ordered_options = {k: options[k] for k in ("A", "B", "C", "D") if k in options}
+        question_text = " ".join(question_bits).strip()
         return {
-            "question_id": str(uuid.uuid4()),
+            "question_id": self._question_id(source_pdf, ordinal, question_text, ordered_options),
             "year": self.defaults.year,
             "subject": subject,
             "topic": topic,
             "subtopic": subtopic,
-            "question_text": " ".join(question_bits).strip(),
+            "question_text": question_text,
             "options": ordered_options,
             "correct_answer": answer,
             "explanation": " ".join(explanation_parts).strip() if explanation_parts else "",
@@ -181,14 +226,15 @@ class McqParser:
 
     def parse(self, raw_text: str) -> list[dict]:
         records: list[dict] = []
+        per_pdf: dict[str, int] = {}
         for source_pdf, body in self._extract_sections(raw_text):
-            lines = self._clean_lines(body)
-            subject, topic, subtopic = self._detect_metadata(lines, self.defaults)
-            blocks = self._split_question_blocks(lines)
-            for block in blocks:
-                parsed = self._parse_question_block(block, source_pdf, subject, topic, subtopic)
+            lines, spans, (subject, topic, subtopic) = self._scan_section(body)
+            for start, end in spans:
+                ordinal = per_pdf.get(source_pdf, 0)
+                parsed = self._parse_question_block(lines, start, end, source_pdf, subject, topic, subtopic, ordinal)
                 if parsed:
                     records.append(parsed)
+                    per_pdf[source_pdf] = ordinal + 1
         return records
 
 
@@ -223,7 +269,7 @@ def main() -> int:
     records = parser.parse(extracted_file.read_text(encoding="utf-8"))
     out_file = output_dir / f"{args.year}.json"
     payload = {"year": args.year, "count": len(records), "questions": records}
-    out_file.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    out_file.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
     print(f"Saved {len(records)} MCQs -> {out_file}")
     return 0
 
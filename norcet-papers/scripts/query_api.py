@@ -7,20 +7,38 @@ Run locally:
 
 from __future__ import annotations
 
-import json
+from collections import defaultdict
+from collections.abc import Hashable
 from pathlib import Path
 from typing import Any
 
+import orjson
 from fastapi import FastAPI, Query
+from fastapi.responses import ORJSONResponse
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 STRUCTURED_JSON_DIR = BASE_DIR / "structured_json"
 
-app = FastAPI(title="NORCET Question Query API", version="0.1.0")
+app = FastAPI(title="NORCET Question Query API", version="0.1.0", default_response_class=ORJSONResponse)
+
+# Parsed files and the assembled bank, keyed by file mtime so a rebuilt
+# dataset is picked up without restarting the server.
+_FILE_CACHE: dict[Path, tuple[int, list[dict[str, Any]]]] = {}
+_BANK_CACHE: tuple[tuple[tuple[Path, int], ...], list[dict[str, Any]]] | None = None
 
 
 def _read_questions_from_file(path: Path) -> list[dict[str, Any]]:
-    payload = json.loads(path.read_text(encoding="utf-8"))
+    mtime = path.stat().st_mtime_ns
+    cached = _FILE_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    questions = _parse_questions_file(path)
+    _FILE_CACHE[path] = (mtime, questions)
+    return questions
+
+
+def _parse_questions_file(path: Path) -> list[dict[str, Any]]:
+    payload = orjson.loads(path.read_bytes())
     if isinstance(payload, dict) and isinstance(payload.get("questions"), list):
         return [q for q in payload["questions"] if isinstance(q, dict)]
     if isinstance(payload, list):
@@ -34,16 +52,55 @@ def load_question_bank() -> list[dict[str, Any]]:
     if tagged_file.exists():
         return _read_questions_from_file(tagged_file)
 
+    global _BANK_CACHE
+    files = sorted(STRUCTURED_JSON_DIR.glob("*.json"))
+    key = tuple((path, path.stat().st_mtime_ns) for path in files)
+    cached = _BANK_CACHE
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
     questions: list[dict[str, Any]] = []
-    for file_path in sorted(STRUCTURED_JSON_DIR.glob("*.json")):
+    for file_path in files:
         questions.extend(_read_questions_from_file(file_path))
+    _BANK_CACHE = (key, questions)
     return questions
 
 
-def _matches_string_filter(value: Any, expected: str) -> bool:
-    if value is None:
-        return False
-    return str(value).strip().casefold() == expected.strip().casefold()
+FILTER_FIELDS = ("subject", "topic", "subtopic")
+# (questions, index) pair, swapped in with one assignment so concurrent
+# requests never pair an index with a different question list.
+_INDEX_CACHE: tuple[list[dict[str, Any]], dict[str, dict[Any, set[int]]]] | None = None
+
+
+def _normalize_filter_value(value: Any) -> str:
+    return str(value).strip().casefold()
+
+
+def _build_index(questions: list[dict[str, Any]]) -> dict[str, dict[Any, set[int]]]:
+    index: dict[str, dict[Any, set[int]]] = {"year": defaultdict(set)}
+    for field in FILTER_FIELDS:
+        index[field] = defaultdict(set)
+
+    for i, q in enumerate(questions):
+        year = q.get("year")
+        if isinstance(year, Hashable):
+            index["year"][year].add(i)
+        for field in FILTER_FIELDS:
+            value = q.get(field)
+            if value is not None:
+                index[field][_normalize_filter_value(value)].add(i)
+    return index
+
+
+def _get_index(questions: list[dict[str, Any]]) -> dict[str, dict[Any, set[int]]]:
+    """Inverted indexes are rebuilt only when the question bank list changes."""
+    global _INDEX_CACHE
+    cached = _INDEX_CACHE
+    if cached is not None and cached[0] is questions:
+        return cached[1]
+    index = _build_index(questions)
+    _INDEX_CACHE = (questions, index)
+    return index
 
 
 def apply_filters(
@@ -53,21 +110,19 @@ def apply_filters(
     topic: str | None = None,
     subtopic: str | None = None,
 ) -> list[dict[str, Any]]:
-    filtered = questions
-
+    wanted: list[tuple[str, Any]] = []
     if year is not None:
-        filtered = [q for q in filtered if q.get("year") == year]
-
-    if subject:
-        filtered = [q for q in filtered if _matches_string_filter(q.get("subject"), subject)]
-
-    if topic:
-        filtered = [q for q in filtered if _matches_string_filter(q.get("topic"), topic)]
-
-    if subtopic:
-        filtered = [q for q in filtered if _matches_string_filter(q.get("subtopic"), subtopic)]
+        wanted.append(("year", year))
+    for field, expected in (("subject", subject), ("topic", topic), ("subtopic", subtopic)):
+        if expected:
+            wanted.append((field, _normalize_filter_value(expected)))
+    if not wanted:
+        return questions
 
-    return filtered
+    index = _get_index(questions)
+    postings = sorted((index[field].get(key, set()) for field, key in wanted), key=len)
+    candidates = postings[0].intersection(*postings[1:])
+    return [questions[i] for i in sorted(candidates)]
 
 
 @app.get("/questions")
@@ -76,17 +131,21 @@ def get_questions(
     subject: str | None = Query(default=None, description="Filter by subject name"),
     topic: str | None = Query(default=None, description="Filter by topic name"),
     subtopic: str | None = Query(default=None, description="Filter by subtopic name"),
-) -> dict[str, Any]:
+) -> ORJSONResponse:
     questions = load_question_bank()
     filtered = apply_filters(questions, year=year, subject=subject, topic=topic, subtopic=subtopic)
 
-    return {
-        "count": len(filtered),
-        "filters": {
-            "year": year,
-            "subject": subject,
-            "topic": topic,
-            "subtopic": subtopic,
-        },
-        "questions": filtered,
-    }
+    # Returning the response directly skips FastAPI's per-row jsonable_encoder
+    # pass; the already-JSON-native dicts go straight to orjson.
+    return ORJSONResponse(
+        {
+            "count": len(filtered),
+            "filters": {
+                "year": year,
+                "subject": subject,
+                "topic": topic,
+                "subtopic": subtopic,
+            },
+            "questions": filtered,
+        }
+    )
@@ -10,15 +10,28 @@ from __future__ import annotations
 
 import argparse
 import glob
-import json
+import hashlib
 import os
 import re
-import urllib.error
-import urllib.request
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+JSON_WRITE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+LLM_BATCH_SIZE = 20
+LLM_CONCURRENCY = 4
+LLM_TIMEOUT = 60
+LLM_URL = "https://api.openai.com/v1/responses"
+RULE_CHUNK_SIZE = 256
+# A label this far above --min-score is a clear winner; the keyword scan stops there.
+STRONG_MATCH_DELTA = 4
+
 DEFAULT_KEYWORDS: dict[str, dict[str, dict[str, list[str]]]] = {
     "Medical-Surgical Nursing": {
         "Emergency & Critical Care": {
@@ -62,60 +75,146 @@ class MatchResult:
     score: int
 
 
+def _interned(result: MatchResult) -> MatchResult:
+    """Point label fields at interned strings.
+
+    A few dozen labels repeat across every tagged question. Results unpickled
+    from workers or read from the LLM cache would otherwise carry their own
+    copies of each label.
+    """
+    for field in ("subject", "topic", "subtopic"):
+        value = getattr(result, field)
+        if type(value) is str:
+            setattr(result, field, sys.intern(value))
+    return result
+
+
 class QuestionTagger:
-    def __init__(self, taxonomy: dict[str, dict[str, dict[str, list[str]]]], min_score: int, use_llm: bool) -> None:
+    def __init__(
+        self,
+        taxonomy: dict[str, dict[str, dict[str, list[str]]]],
+        min_score: int,
+        use_llm: bool,
+        llm_cache_path: Path | None = None,
+        workers: int = 1,
+    ) -> None:
         self.taxonomy = taxonomy
         self.min_score = min_score
         self.use_llm = use_llm
+        self.workers = max(1, workers)
+        self.strong_score = min_score + STRONG_MATCH_DELTA
+
+        # Tagging is a pure function of the text, so repeated questions across
+        # papers are answered from memory. LLM answers also persist across runs.
+        self._rule_cache: dict[str, MatchResult] = {}
+        self.llm_cache_path = llm_cache_path
+        self._http: requests.Session | None = None
+        self._llm_cache: dict[str, dict[str, str]] = {}
+        if llm_cache_path and llm_cache_path.exists():
+            try:
+                self._llm_cache = orjson.loads(llm_cache_path.read_bytes())
+            except orjson.JSONDecodeError:
+                self._llm_cache = {}
+
+        # Flatten the taxonomy once: every distinct keyword is scanned a single
+        # time per question and credited to each subtopic that lists it.
+        self._labels: list[tuple[str, str, str]] = []
+        keyword_labels: dict[str, list[int]] = {}
+        for subject, topics in taxonomy.items():
+            for topic, subtopics in topics.items():
+                for subtopic, keywords in subtopics.items():
+                    label_id = len(self._labels)
+                    self._labels.append((sys.intern(subject), sys.intern(topic), sys.intern(subtopic)))
+                    for kw in keywords:
+                        # Lowercased once here; padding is kept, as it is part of how a
+                        # keyword matches. Blank entries would match every question.
+                        if kw.strip():
+                            keyword_labels.setdefault(kw.lower(), []).append(label_id)
+        self._keyword_labels = {kw: tuple(ids) for kw, ids in keyword_labels.items()}
+        # One compiled alternation acts as a C-level prefilter: a text with no
+        # keyword anywhere in it skips the per-keyword scan entirely.
+        self._any_keyword_re = (
+            re.compile("|".join(map(re.escape, self._keyword_labels)))
+            if self._keyword_labels
+            else None
+        )
 
     @staticmethod
     def _normalize(text: str) -> str:
         return re.sub(r"\s+", " ", text.lower()).strip()
 
-    def _rule_based_tag(self, text: str) -> MatchResult:
-        best = MatchResult(subject="Unknown", topic="Unknown", subtopic="Unknown", score=0)
-        normalized = self._normalize(text)
-
-        for subject, topics in self.taxonomy.items():
-            for topic, subtopics in topics.items():
-                for subtopic, keywords in subtopics.items():
-                    score = 0
-                    for kw in keywords:
-                        if kw.lower() in normalized:
-                            score += 1
-                    if score > best.score:
-                        best = MatchResult(subject=subject, topic=topic, subtopic=subtopic, score=score)
-        return best
-
-    def _llm_tag(self, text: str) -> MatchResult:
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            return MatchResult(subject="Unknown", topic="Unknown", subtopic="Unknown", score=0)
+    def _tag_normalized(self, normalized: str) -> MatchResult:
+        cached = self._rule_cache.get(normalized)
+        if cached is not None:
+            return cached
+
+        scores = [0] * len(self._labels)
+        if self._any_keyword_re is not None and self._any_keyword_re.search(normalized):
+            strong_score = self.strong_score
+            for kw, label_ids in self._keyword_labels.items():
+                if kw in normalized:
+                    strong = False
+                    for label_id in label_ids:
+                        scores[label_id] += 1
+                        strong = strong or scores[label_id] >= strong_score
+                    if strong:
+                        break
+
+        best_score = max(scores, default=0)
+        if best_score == 0:
+            result = MatchResult(subject="Unknown", topic="Unknown", subtopic="Unknown", score=0)
+        else:
+            # index() picks the first label in taxonomy order on ties.
+            subject, topic, subtopic = self._labels[scores.index(best_score)]
+            result = MatchResult(subject=subject, topic=topic, subtopic=subtopic, score=best_score)
+        self._rule_cache[normalized] = result
+        return result
+
+    def save_llm_cache(self) -> None:
+        if not self.llm_cache_path or not self._llm_cache:
+            return
+        self.llm_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.llm_cache_path.write_bytes(orjson.dumps(self._llm_cache, option=JSON_WRITE_OPTIONS))
 
-        prompt = (
-            "Classify the nursing exam MCQ text into JSON with keys subject, topic, subtopic. "
-            "Return ONLY minified JSON. Text: "
-            f"{text[:2500]}"
-        )
+    @staticmethod
+    def _llm_cache_key(snippet: str) -> str:
+        return hashlib.blake2b(snippet.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _http_session(self) -> requests.Session:
+        # Opened on first LLM use and shared by the batch threads, so TCP/TLS
+        # setup is paid once per connection instead of once per prompt.
+        if self._http is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=LLM_CONCURRENCY))
+            self._http = session
+        return self._http
+
+    def close(self) -> None:
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def _call_llm(self, prompt: str, api_key: str) -> Any:
+        """Send one prompt and return the parsed JSON answer, or None on failure."""
         payload = {
             "model": "gpt-4.1-mini",
             "input": prompt,
             "temperature": 0,
         }
-        req = urllib.request.Request(
-            "https://api.openai.com/v1/responses",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
         try:
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                raw = json.loads(resp.read().decode("utf-8"))
-        except (urllib.error.URLError, TimeoutError, json.JSONDecodeError):
-            return MatchResult(subject="Unknown", topic="Unknown", subtopic="Unknown", score=0)
+            resp = self._http_session().post(
+                LLM_URL,
+                data=orjson.dumps(payload),
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                timeout=LLM_TIMEOUT,
+            )
+            resp.raise_for_status()
+            raw = orjson.loads(resp.content)
+        except (requests.RequestException, orjson.JSONDecodeError):
+            return None
 
         output_text = ""
         for item in raw.get("output", []):
@@ -123,56 +222,135 @@ class QuestionTagger:
                 if content.get("type") == "output_text":
                     output_text += content.get("text", "")
         try:
-            parsed = json.loads(output_text.strip())
-        except json.JSONDecodeError:
-            return MatchResult(subject="Unknown", topic="Unknown", subtopic="Unknown", score=0)
-
-        return MatchResult(
-            subject=parsed.get("subject", "Unknown") or "Unknown",
-            topic=parsed.get("topic", "Unknown") or "Unknown",
-            subtopic=parsed.get("subtopic", "Unknown") or "Unknown",
-            score=1,
+            return orjson.loads(output_text.strip())
+        except orjson.JSONDecodeError:
+            return None
+
+    def _llm_request_batch(self, snippets: list[str], api_key: str) -> list[dict[str, str] | None]:
+        """Classify several snippets with one prompt; one entry per snippet."""
+        numbered = "\n".join(f"{i}. {snippet}" for i, snippet in enumerate(snippets, start=1))
+        prompt = (
+            "Classify each numbered nursing exam MCQ text into subject, topic, subtopic. "
+            "Return ONLY a minified JSON array with one object per item, in the same order, "
+            "each with keys subject, topic, subtopic. Items:\n"
+            f"{numbered}"
         )
+        parsed = self._call_llm(prompt, api_key)
+        if not isinstance(parsed, list) or len(parsed) != len(snippets):
+            return [None] * len(snippets)
+
+        results: list[dict[str, str] | None] = []
+        for item in parsed:
+            if not isinstance(item, dict):
+                results.append(None)
+                continue
+            results.append(
+                {
+                    "subject": item.get("subject", "Unknown") or "Unknown",
+                    "topic": item.get("topic", "Unknown") or "Unknown",
+                    "subtopic": item.get("subtopic", "Unknown") or "Unknown",
+                }
+            )
+        return results
+
+    def _llm_tag_batch(self, texts: list[str]) -> list[MatchResult]:
+        """LLM-tag many texts: cache first, then batched prompts sent concurrently."""
+        unknown = MatchResult(subject="Unknown", topic="Unknown", subtopic="Unknown", score=0)
+        snippets = [text[:2500] for text in texts]
+        keys = [self._llm_cache_key(snippet) for snippet in snippets]
+
+        api_key = os.environ.get("OPENAI_API_KEY")
+        missing = list(dict.fromkeys(k for k in keys if k not in self._llm_cache))
+        if missing and api_key:
+            snippet_by_key = dict(zip(keys, snippets))
+            batches = [missing[i : i + LLM_BATCH_SIZE] for i in range(0, len(missing), LLM_BATCH_SIZE)]
+            self._http_session()
+            with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+                answers = executor.map(
+                    lambda batch: self._llm_request_batch([snippet_by_key[k] for k in batch], api_key),
+                    batches,
+                )
+                for batch, batch_answers in zip(batches, answers):
+                    for key, labels in zip(batch, batch_answers):
+                        if labels is not None:
+                            self._llm_cache[key] = labels
+
+        return [
+            _interned(MatchResult(**self._llm_cache[k], score=1)) if k in self._llm_cache else unknown for k in keys
+        ]
 
     @staticmethod
     def _question_text(question: dict[str, Any]) -> str:
+        parts: list[Any] = [question.get("question_text", "")]
         options = question.get("options", {})
         if isinstance(options, dict):
-            option_values = " ".join(str(v) for v in options.values())
+            parts.extend(options.values())
         elif isinstance(options, list):
-            option_values = " ".join(str(v) for v in options)
-        else:
-            option_values = ""
-        return " ".join(
-            [
-                str(question.get("question_text", "")),
-                option_values,
-                str(question.get("explanation", "")),
-            ]
-        )
+            parts.extend(options)
+        if len(parts) == 1:
+            # Keep the empty options slot so the text (and LLM cache keys) are unchanged.
+            parts.append("")
+        parts.append(question.get("explanation", ""))
+        return " ".join(map(str, parts))
+
+    def _rule_tag_texts(self, texts: list[str]) -> list[MatchResult]:
+        """Rule-tag texts, sharding distinct uncached texts across worker processes."""
+        normalized = [self._normalize(text) for text in texts]
+        pending = [n for n in dict.fromkeys(normalized) if n not in self._rule_cache]
+        if self.workers > 1 and len(pending) > RULE_CHUNK_SIZE:
+            chunks = [pending[i : i + RULE_CHUNK_SIZE] for i in range(0, len(pending), RULE_CHUNK_SIZE)]
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(chunks)),
+                initializer=_init_rule_worker,
+                initargs=(self.taxonomy, self.min_score),
+            ) as executor:
+                for chunk, results in zip(chunks, executor.map(_rule_tag_chunk, chunks)):
+                    self._rule_cache.update(zip(chunk, map(_interned, results)))
+        return [self._tag_normalized(n) for n in normalized]
+
+    def tag_questions(self, questions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Tag questions by rules first, then send low-confidence ones to the LLM in batches."""
+        texts = [self._question_text(q) for q in questions]
+        rules = self._rule_tag_texts(texts)
+
+        llm_results: dict[int, MatchResult] = {}
+        if self.use_llm:
+            low = [i for i, rule in enumerate(rules) if rule.score < self.min_score]
+            llm_results = dict(zip(low, self._llm_tag_batch([texts[i] for i in low])))
+
+        tagged_questions: list[dict[str, Any]] = []
+        for i, question in enumerate(questions):
+            final = rules[i]
+            method = "rule_based"
+            llm = llm_results.get(i)
+            if llm is not None and llm.subject != "Unknown":
+                final = llm
+                method = "llm"
+
+            tagged = dict(question)
+            tagged["subject"] = final.subject
+            tagged["topic"] = final.topic
+            tagged["subtopic"] = final.subtopic
+            tagged["tagging_method"] = method
+            tagged["tag_confidence"] = final.score
+            tagged_questions.append(tagged)
+        return tagged_questions
 
     def tag_question(self, question: dict[str, Any]) -> dict[str, Any]:
-        text = self._question_text(question)
-        rule = self._rule_based_tag(text)
-        method = "rule_based"
+        return self.tag_questions([question])[0]
+
+
+_WORKER_TAGGER: QuestionTagger | None = None
 
-        if rule.score < self.min_score and self.use_llm:
-            llm = self._llm_tag(text)
-            if llm.subject != "Unknown":
-                final = llm
-                method = "llm"
-            else:
-                final = rule
-        else:
-            final = rule
 
-        tagged = dict(question)
-        tagged["subject"] = final.subject
-        tagged["topic"] = final.topic
-        tagged["subtopic"] = final.subtopic
-        tagged["tagging_method"] = method
-        tagged["tag_confidence"] = final.score
-        return tagged
+def _init_rule_worker(taxonomy: dict[str, dict[str, dict[str, list[str]]]], min_score: int) -> None:
+    global _WORKER_TAGGER
+    _WORKER_TAGGER = QuestionTagger(taxonomy=taxonomy, min_score=min_score, use_llm=False)
+
+
+def _rule_tag_chunk(normalized_texts: list[str]) -> list[MatchResult]:
+    assert _WORKER_TAGGER is not None
+    return [_WORKER_TAGGER._tag_normalized(text) for text in normalized_texts]
 
 
 def parse_args() -> argparse.Namespace:
@@ -183,13 +361,24 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--keyword-file", type=Path, help="Optional JSON taxonomy override")
     parser.add_argument("--min-score", type=int, default=2)
     parser.add_argument("--use-llm", action="store_true", help="Enable LLM fallback for low-confidence matches")
+    parser.add_argument(
+        "--llm-cache",
+        default="logs/llm_tag_cache.json",
+        help="JSON cache of LLM tags keyed by question-text hash, reused across runs",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for the rule-based pass (LLM fallback always runs in the main process)",
+    )
     return parser.parse_args()
 
 
 def load_taxonomy(keyword_file: Path | None) -> dict[str, dict[str, dict[str, list[str]]]]:
     if not keyword_file:
         return DEFAULT_KEYWORDS
-    data = json.loads(keyword_file.read_text(encoding="utf-8"))
+    data = orjson.loads(keyword_file.read_bytes())
     return data
 
 
@@ -205,27 +394,41 @@ def main() -> int:
     args = parse_args()
     root_dir = args.root_dir
     taxonomy = load_taxonomy(args.keyword_file)
-    tagger = QuestionTagger(taxonomy=taxonomy, min_score=args.min_score, use_llm=args.use_llm)
+    tagger = QuestionTagger(
+        taxonomy=taxonomy,
+        min_score=args.min_score,
+        use_llm=args.use_llm,
+        llm_cache_path=root_dir / args.llm_cache,
+        workers=args.workers,
+    )
 
     input_paths = sorted(Path(p) for p in glob.glob(str(root_dir / args.input_glob)))
     output_file = root_dir / args.output
 
-    tagged_questions: list[dict[str, Any]] = []
+    # Gather everything first so low-confidence questions can be LLM-tagged in batches.
+    questions: list[dict[str, Any]] = []
+    source_files: list[str] = []
     for path in input_paths:
         if path.resolve() == output_file.resolve():
             continue
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = orjson.loads(path.read_bytes())
         for q in extract_questions(payload):
-            tagged = tagger.tag_question(q)
-            tagged["source_file"] = path.name
-            tagged_questions.append(tagged)
+            questions.append(q)
+            source_files.append(path.name)
+
+    tagged_questions = tagger.tag_questions(questions)
+    for tagged, source_file in zip(tagged_questions, source_files):
+        tagged["source_file"] = source_file
+
+    tagger.save_llm_cache()
+    tagger.close()
 
     output_file.parent.mkdir(parents=True, exist_ok=True)
     output_payload = {
         "count": len(tagged_questions),
         "questions": tagged_questions,
     }
-    output_file.write_text(json.dumps(output_payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    output_file.write_bytes(orjson.dumps(output_payload, option=JSON_WRITE_OPTIONS))
     print(f"Saved {len(tagged_questions)} tagged questions -> {output_file}")
     return 0
 
@@ -4,10 +4,16 @@
 from __future__ import annotations
 
 import argparse
-import json
 from collections import Counter
 from pathlib import Path
 
+import orjson
+
+from build_dataset import dedupe_key
+
+OPTION_KEYS = ("A", "B", "C", "D")
+VALID_ANSWERS = frozenset(OPTION_KEYS)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Validate NORCET dataset quality")
@@ -18,11 +24,11 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> int:
     args = parse_args()
-    payload = json.loads((args.root_dir / args.input).read_text(encoding="utf-8"))
+    payload = orjson.loads((args.root_dir / args.input).read_bytes())
     questions = payload.get("questions", [])
 
     problems: list[str] = []
-    signatures: set[tuple] = set()
+    signatures: set[bytes] = set()
     year_counts = Counter()
 
     for idx, q in enumerate(questions, start=1):
@@ -34,15 +40,16 @@ def main() -> int:
             problems.append(f"Q{idx}: options must be an object")
             continue
 
-        for key in ("A", "B", "C", "D"):
-            if key not in options or not str(options[key]).strip():
+        for key in OPTION_KEYS:
+            if not str(options.get(key, "")).strip():
                 problems.append(f"Q{idx}: missing option {key}")
 
         answer = q.get("correct_answer")
-        if answer not in {"A", "B", "C", "D"}:
+        if answer not in VALID_ANSWERS:
             problems.append(f"Q{idx}: invalid correct_answer '{answer}'")
 
-        signature = (year, str(q.get("question_text", "")).strip(), json.dumps(options, sort_keys=True, ensure_ascii=False))
+        # Same identity build_dataset dedupes on, so both scripts agree on what a duplicate is.
+        signature = dedupe_key(q)
         if signature in signatures:
             problems.append(f"Q{idx}: duplicate question detected")
         signatures.add(signature)
@@ -1,45 +1,65 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
+import re
 from pathlib import Path
 
+import orjson
+
 ROOT = Path(__file__).resolve().parents[1]
 STRUCTURED_DIR = ROOT / "structured_json"
 KEYWORDS_FILE = STRUCTURED_DIR / "topic_keywords.json"
+JSON_WRITE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 
 
 def load_keywords() -> dict:
-    return json.loads(KEYWORDS_FILE.read_text(encoding="utf-8"))
+    return orjson.loads(KEYWORDS_FILE.read_bytes())
 
 
-def classify(text: str, keyword_map: dict) -> tuple[str, str, str]:
-    normalized = text.lower()
+Rule = tuple[re.Pattern[str], tuple[str, str, str]]
+
+
+def flatten_keywords(keyword_map: dict) -> list[Rule]:
+    """Flatten the nested keyword map once into ordered (pattern, label) rules.
+
+    Each subtopic's keywords become one escaped alternation, so a rule costs a
+    single C-level search instead of one substring test per keyword.
+    """
+    rules: list[Rule] = []
     for subject, topics in keyword_map.items():
         for topic, subtopics in topics.items():
             for subtopic, keywords in subtopics.items():
-                if any(keyword.lower() in normalized for keyword in keywords):
-                    return subject, topic, subtopic
+                cleaned = [keyword.lower() for keyword in keywords if keyword.strip()]
+                if cleaned:
+                    rules.append((re.compile("|".join(map(re.escape, cleaned))), (subject, topic, subtopic)))
+    return rules
+
+
+def classify(text: str, rules: list[Rule]) -> tuple[str, str, str]:
+    normalized = text.lower()
+    for pattern, label in rules:
+        if pattern.search(normalized):
+            return label
     return "Uncategorized", "Uncategorized", "Uncategorized"
 
 
 def main() -> None:
-    keyword_map = load_keywords()
+    rules = flatten_keywords(load_keywords())
 
     for json_file in sorted(STRUCTURED_DIR.glob("*.json")):
         if json_file.name == KEYWORDS_FILE.name:
             continue
-        rows = json.loads(json_file.read_text(encoding="utf-8"))
+        rows = orjson.loads(json_file.read_bytes())
         if not isinstance(rows, list):
             continue
 
         for row in rows:
-            subject, topic, subtopic = classify(row.get("question_text", ""), keyword_map)
+            subject, topic, subtopic = classify(row.get("question_text", ""), rules)
             row["subject"] = subject
             row["topic"] = topic
             row["subtopic"] = subtopic
 
-        json_file.write_text(json.dumps(rows, indent=2, ensure_ascii=False), encoding="utf-8")
+        json_file.write_bytes(orjson.dumps(rows, option=JSON_WRITE_OPTIONS))
 
 
 if __name__ == "__main__":
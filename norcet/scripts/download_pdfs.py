@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import functools
 import hashlib
-import json
 import logging
+import os
 import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
 from urllib.parse import urlparse, urlunparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import orjson
 
 ROOT = Path(__file__).resolve().parents[1]
 RAW_DIR = ROOT / "raw_pdfs"
@@ -19,6 +27,10 @@ MANIFEST_FILE = LOGS_DIR / "download_manifest.json"
 HASH_MANIFEST_FILE = LOGS_DIR / "hash_manifest.json"
 
 YEAR_RE = re.compile(r"(20\d{2})")
+MAX_WORKERS = 16
+STREAM_CHUNK_SIZE = 1 << 20
+PDF_MAGIC = b"%PDF"
+JSON_WRITE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 
 
 def setup_logging() -> None:
@@ -35,14 +47,35 @@ def read_urls(path: Path) -> list[str]:
     return urls
 
 
+@functools.lru_cache(maxsize=32)
+def _read_json_bytes(path: str, mtime_ns: int) -> bytes:
+    return Path(path).read_bytes()
+
+
+def load_json_cached(path: Path) -> dict:
+    """Parse ``path`` from bytes cached by ``(path, mtime_ns)``.
+
+    An orchestrator calling main() repeatedly skips re-reading unchanged
+    manifests. Each call parses a fresh dict, so callers may mutate it
+    without corrupting the cache.
+    """
+    return orjson.loads(_read_json_bytes(str(path), path.stat().st_mtime_ns))
+
+
 def load_json(path: Path, default: dict) -> dict:
     if not path.exists():
         return default
-    return json.loads(path.read_text(encoding="utf-8"))
+    return load_json_cached(path)
 
 
 def write_json(path: Path, data: dict) -> None:
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    """Write JSON atomically, leaving the file untouched when nothing changed."""
+    payload = orjson.dumps(data, option=JSON_WRITE_OPTIONS)
+    if path.exists() and path.read_bytes() == payload:
+        return
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
 
 
 def strip_fragment(url: str) -> str:
@@ -66,12 +99,44 @@ def detect_year(url: str, filename: str) -> str:
     return "unknown"
 
 
-def is_pdf_bytes(data: bytes) -> bool:
-    return data.startswith(b"%PDF") and len(data) > 1000
-
-
-def sha256(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+def fetch_pdf(session: requests.Session, url: str) -> tuple[Path, str]:
+    """Stream a PDF into a temp file under raw_pdfs, hashing it on the way.
+
+    Returns the temp path and the SHA-256 hex digest; the caller moves or
+    deletes the file.
+    """
+    with session.get(url, timeout=90, stream=True) as response:
+        response.raise_for_status()
+        # One iterator for the whole body (raw reads beside iter_content break
+        # chunked responses); the magic bytes are checked from its first
+        # chunk(s) before a temp file is created.
+        chunks = response.iter_content(STREAM_CHUNK_SIZE)
+        pending: list[bytes] = []
+        head = b""
+        for chunk in chunks:
+            pending.append(chunk)
+            head += chunk[: len(PDF_MAGIC) - len(head)]
+            if len(head) == len(PDF_MAGIC):
+                break
+        if head != PDF_MAGIC:
+            raise ValueError("Not a valid PDF response")
+        hasher = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=RAW_DIR, suffix=".part", delete=False) as out:
+            try:
+                for chunk in chain(pending, chunks):
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+                if size <= 1000:
+                    raise ValueError("Not a valid PDF response")
+            except BaseException:
+                out.close()
+                os.unlink(out.name)
+                raise
+    # NamedTemporaryFile creates 0600 files; saved PDFs should stay readable.
+    os.chmod(out.name, 0o644)
+    return Path(out.name), hasher.hexdigest()
 
 
 def log_failure(source_url: str, reason: str) -> None:
@@ -88,52 +153,68 @@ def main() -> None:
 
     session = requests.Session()
     session.headers.update({"User-Agent": "Mozilla/5.0 (NORCET PDF Downloader)"})
-
+    # The default pool keeps 10 connections per host; size it to the worker
+    # count so concurrent fetches reuse connections instead of discarding them.
+    # Transient gateway errors are retried with backoff rather than logged as failures.
+    adapter = HTTPAdapter(
+        pool_connections=MAX_WORKERS,
+        pool_maxsize=MAX_WORKERS,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    pending: dict[str, None] = {}
     for source_url in read_urls(LINKS_FILE):
         clean_url = strip_fragment(source_url)
-        if clean_url in manifest["by_url"]:
+        if clean_url in manifest["by_url"] or clean_url in pending:
             logging.info("Skip known URL: %s", clean_url)
             continue
-
-        try:
-            response = session.get(clean_url, timeout=90)
-            response.raise_for_status()
-            data = response.content
-            if not is_pdf_bytes(data):
-                raise ValueError("Not a valid PDF response")
-
-            digest = sha256(data)
-            if digest in hash_manifest["by_hash"]:
+        pending[clean_url] = None
+
+    # Fetches run concurrently; results are consumed in input order on this
+    # thread, so manifest updates and file naming need no locking.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(fetch_pdf, session, url) for url in pending]
+        for clean_url, future in zip(pending, futures):
+            tmp_path: Path | None = None
+            try:
+                tmp_path, digest = future.result()
+                if digest in hash_manifest["by_hash"]:
+                    manifest["by_url"][clean_url] = {
+                        "status": "duplicate",
+                        "matched_hash": digest,
+                        "stored_as": hash_manifest["by_hash"][digest]["path"],
+                    }
+                    logging.info("Skip duplicate by hash: %s", clean_url)
+                    continue
+
+                filename = filename_from_url(clean_url)
+                year = detect_year(clean_url, filename)
+                out_dir = RAW_DIR / year
+                out_dir.mkdir(parents=True, exist_ok=True)
+
+                out_path = out_dir / filename
+                if out_path.exists():
+                    out_path = out_dir / f"{out_path.stem}_{digest[:8]}.pdf"
+                os.replace(tmp_path, out_path)
+                tmp_path = None
+
+                rel = str(out_path.relative_to(ROOT))
+                hash_manifest["by_hash"][digest] = {"path": rel}
                 manifest["by_url"][clean_url] = {
-                    "status": "duplicate",
-                    "matched_hash": digest,
-                    "stored_as": hash_manifest["by_hash"][digest]["path"],
+                    "status": "downloaded",
+                    "hash": digest,
+                    "path": rel,
                 }
-                logging.info("Skip duplicate by hash: %s", clean_url)
-                continue
-
-            filename = filename_from_url(clean_url)
-            year = detect_year(clean_url, filename)
-            out_dir = RAW_DIR / year
-            out_dir.mkdir(parents=True, exist_ok=True)
-
-            out_path = out_dir / filename
-            if out_path.exists():
-                out_path = out_dir / f"{out_path.stem}_{digest[:8]}.pdf"
-            out_path.write_bytes(data)
-
-            rel = str(out_path.relative_to(ROOT))
-            hash_manifest["by_hash"][digest] = {"path": rel}
-            manifest["by_url"][clean_url] = {
-                "status": "downloaded",
-                "hash": digest,
-                "path": rel,
-            }
-            logging.info("Downloaded %s -> %s", clean_url, out_path)
-        except Exception as exc:  # noqa: BLE001
-            manifest["by_url"][clean_url] = {"status": "failed", "error": str(exc)}
-            log_failure(clean_url, str(exc))
-            logging.error("Failed %s (%s)", clean_url, exc)
+                logging.info("Downloaded %s -> %s", clean_url, out_path)
+            except Exception as exc:  # noqa: BLE001
+                manifest["by_url"][clean_url] = {"status": "failed", "error": str(exc)}
+                log_failure(clean_url, str(exc))
+                logging.error("Failed %s (%s)", clean_url, exc)
+            finally:
+                if tmp_path is not None:
+                    tmp_path.unlink(missing_ok=True)
 
     write_json(MANIFEST_FILE, manifest)
     write_json(HASH_MANIFEST_FILE, hash_manifest)
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator, TextIO
 
 import fitz
 import pdfplumber
@@ -10,34 +16,115 @@ import pdfplumber
 ROOT = Path(__file__).resolve().parents[1]
 RAW_DIR = ROOT / "raw_pdfs"
 OUT_DIR = ROOT / "extracted_text"
+# Bump when page extraction or cleanup changes so previously cached text is not reused.
+EXTRACTOR_VERSION = 1
+CACHE_ROOT = OUT_DIR / "_cache"
+CACHE_DIR = CACHE_ROOT / f"v{EXTRACTOR_VERSION}"
 
 
-def extract_pdf_text(pdf_path: Path) -> str:
-    try:
-        with pdfplumber.open(str(pdf_path)) as pdf:
-            pages = [(page.extract_text() or "") for page in pdf.pages]
-        text = "\n\n".join(pages).strip()
-        if text:
-            return text
-    except Exception:  # noqa: BLE001
-        pass
+def iter_fitz_pages(pdf_path: Path) -> Iterator[str]:
+    # MuPDF returns text blocks already in reading order; block_type 0 is text.
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            yield "\n".join(block[4].rstrip("\n") for block in page.get_text("blocks") if block[6] == 0)
 
-    doc = fitz.open(pdf_path)
-    pages = [page.get_text("text") for page in doc]
-    doc.close()
-    return "\n\n".join(pages).strip()
+
+def iter_pdfplumber_pages(pdf_path: Path) -> Iterator[str]:
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+
+
+def write_pages(out: TextIO, pages: Iterable[str]) -> bool:
+    """Stream pages separated by blank lines, with leading/trailing whitespace trimmed.
+
+    Only trailing whitespace is held back, so memory stays at one page.
+    Returns whether any text was written.
+    """
+    wrote = False
+    pending = ""
+    for i, page in enumerate(pages):
+        piece = page if i == 0 else f"\n\n{page}"
+        if not wrote:
+            piece = piece.lstrip()
+        body = piece.rstrip()
+        if body:
+            out.write(pending + body)
+            pending = piece[len(body) :]
+            wrote = True
+        elif wrote:
+            pending += piece
+    return wrote
+
+
+def sha256_file(path: Path) -> str:
+    with path.open("rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def extract_to_cache(pdf_file: Path, cache_path: Path) -> None:
+    """Stream a PDF's page text into ``cache_path``, replacing it atomically."""
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=cache_path.parent, suffix=".part", delete=False
+    ) as out:
+        try:
+            try:
+                wrote = write_pages(out, iter_fitz_pages(pdf_file))
+            except Exception:  # noqa: BLE001
+                wrote = False
+            if not wrote:
+                out.seek(0)
+                out.truncate()
+                write_pages(out, iter_pdfplumber_pages(pdf_file))
+        except BaseException:
+            out.close()
+            os.unlink(out.name)
+            raise
+    os.replace(out.name, cache_path)
+
+
+def process_pdf(pdf_file: Path) -> tuple[Path, Path, bool]:
+    """Extract one PDF in a worker process.
+
+    Extracted text is cached under extracted_text/_cache/v<EXTRACTOR_VERSION>
+    by the PDF's SHA-256, so unchanged PDFs are not re-extracted on later runs.
+    Returns the output path, the cache path and whether the cache was hit.
+    """
+    year = pdf_file.parent.name
+    out_path = OUT_DIR / f"{year}_{pdf_file.stem}.txt"
+    cache_path = CACHE_DIR / f"{sha256_file(pdf_file)}.txt"
+    cached = cache_path.exists()
+    if not cached:
+        extract_to_cache(pdf_file, cache_path)
+
+    with out_path.open("w", encoding="utf-8") as out, cache_path.open(encoding="utf-8", newline="") as body:
+        out.write(f"__SOURCE_PDF__:{pdf_file.name}\n\n")
+        shutil.copyfileobj(body, out)
+        out.write("\n")
+    return out_path, cache_path, cached
+
+
+def prune_cache(keep: set[Path]) -> None:
+    """Drop cache directories from other extractor versions and entries for PDFs no longer present."""
+    for entry in CACHE_ROOT.iterdir():
+        if entry.is_dir() and entry != CACHE_DIR:
+            shutil.rmtree(entry)
+    for entry in CACHE_DIR.iterdir():
+        if entry not in keep:
+            entry.unlink()
 
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    for pdf_file in sorted(RAW_DIR.glob("*/*.pdf")):
-        year = pdf_file.parent.name
-        out_path = OUT_DIR / f"{year}_{pdf_file.stem}.txt"
-        text = extract_pdf_text(pdf_file)
-        out_path.write_text(f"__SOURCE_PDF__:{pdf_file.name}\n\n{text}\n", encoding="utf-8")
-        logging.info("Extracted %s", out_path)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    pdf_files = [path.resolve() for path in sorted(RAW_DIR.glob("*/*.pdf"))]
+    used: set[Path] = set()
+    with ProcessPoolExecutor() as executor:
+        for out_path, cache_path, cached in executor.map(process_pdf, pdf_files):
+            used.add(cache_path)
+            logging.info("%s %s", "Reused cached text for" if cached else "Extracted", out_path)
+    prune_cache(used)
 
 
 if __name__ == "__main__":
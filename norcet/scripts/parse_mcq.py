@@ -1,37 +1,77 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
 import re
+import uuid
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Iterable
+
+import orjson
 
 ROOT = Path(__file__).resolve().parents[1]
 TEXT_DIR = ROOT / "extracted_text"
 OUT_DIR = ROOT / "structured_json"
 
-QUESTION_RE = re.compile(r"^(?:Q(?:uestion)?\s*)?(\d{1,3})[\).:-]\s*(.*)$", re.IGNORECASE)
-OPTION_RE = re.compile(r"^[\(\[]?([A-D])[\)\].:-]\s*(.*)$", re.IGNORECASE)
+# One pass per line: a question heading ("Q12." / "12)") or an option ("(A)" / "b.").
+LINE_RE = re.compile(
+    r"(?:Q(?:uestion)?\s*)?(?P<qn>\d{1,3})[\).:-]\s*(?P<qt>.*)$"
+    r"|[\(\[]?(?P<opt>[A-D])[\)\].:-]\s*(?P<ot>.*)$",
+    re.IGNORECASE,
+)
+# Besides digits, the only characters a LINE_RE match can start with.
+LINE_FIRST_CHARS = frozenset("qQ([ABCDabcd")
+WS_RE = re.compile(r"\s+")
+JSON_WRITE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def question_id(source_pdf: str, year: str, ordinal: int, question_text: str, options: dict[str, str]) -> str:
+    """Deterministic UUID, stable across re-parses of the same text.
+
+    ``ordinal`` is the question's position within its source PDF, so repeated
+    questions in one paper still get distinct ids.
+    """
+    key = "\x1f".join(
+        [source_pdf, year, str(ordinal), question_text, *(f"{k}={v}" for k, v in options.items())]
+    )
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
 
 
-def parse_questions(lines: list[str], year: str, source_pdf: str) -> list[dict]:
+def parse_questions(lines: Iterable[str], year: str, source_pdf: str) -> list[dict]:
     rows: list[dict] = []
+    year_value = int(year) if year.isdigit() else None
     current: dict | None = None
     current_opt: str | None = None
+    # Text is collected as parts and joined once per question instead of
+    # re-concatenating the growing string on every continuation line.
+    question_parts: list[str] = []
+    option_parts: dict[str, list[str]] = {}
+
+    def flush() -> None:
+        if current and len(option_parts) == 4:
+            current["question_text"] = " ".join(question_parts)
+            current["options"] = {key: " ".join(parts) for key, parts in option_parts.items()}
+            current["question_id"] = question_id(
+                source_pdf, year, len(rows), current["question_text"], current["options"]
+            )
+            rows.append(current)
 
     for raw in lines:
-        line = re.sub(r"\s+", " ", raw).strip()
+        line = WS_RE.sub(" ", raw).strip()
         if not line:
             continue
 
-        q = QUESTION_RE.match(line)
-        if q:
-            if current and len(current["options"]) == 4:
-                rows.append(current)
+        first = line[0]
+        m = LINE_RE.match(line) if first in LINE_FIRST_CHARS or first.isdecimal() else None
+        if m and m.group("qn") is not None:
+            flush()
             current = {
-                "year": int(year) if year.isdigit() else None,
-                "question_number": int(q.group(1)),
-                "question_text": q.group(2).strip(),
+                "question_id": None,
+                "year": year_value,
+                "question_number": int(m.group("qn")),
+                "question_text": "",
                 "options": {},
                 "correct_answer": None,
                 "subject": None,
@@ -39,46 +79,54 @@ def parse_questions(lines: list[str], year: str, source_pdf: str) -> list[dict]:
                 "subtopic": None,
                 "source_pdf": source_pdf,
             }
+            head = m.group("qt").strip()
+            question_parts = [head] if head else []
+            option_parts = {}
             current_opt = None
             continue
 
         if current is None:
             continue
 
-        o = OPTION_RE.match(line)
-        if o:
-            current_opt = o.group(1).upper()
-            current["options"][current_opt] = o.group(2).strip()
+        if m:
+            current_opt = m.group("opt").upper()
+            text = m.group("ot").strip()
+            option_parts[current_opt] = [text] if text else []
             continue
 
         if current_opt:
-            current["options"][current_opt] = f"{current['options'][current_opt]} {line}".strip()
+            option_parts[current_opt].append(line)
         else:
-            current["question_text"] = f"{current['question_text']} {line}".strip()
-
-    if current and len(current["options"]) == 4:
-        rows.append(current)
+            question_parts.append(line)
 
+    flush()
     return rows
 
 
+def parse_file(txt_file: Path) -> tuple[str, list[dict]]:
+    year = txt_file.stem.split("_", 1)[0]
+    lines = txt_file.read_text(encoding="utf-8", errors="ignore").splitlines()
+    source_pdf = "unknown.pdf"
+    start = 0
+    if lines and lines[0].startswith("__SOURCE_PDF__:"):
+        source_pdf = lines[0].split(":", 1)[1].strip()
+        start = 1
+    # islice skips the header line without copying the rest of the list.
+    return year, parse_questions(islice(lines, start, None), year, source_pdf)
+
+
 def main() -> None:
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     grouped: dict[str, list[dict]] = defaultdict(list)
 
-    for txt_file in sorted(TEXT_DIR.glob("*.txt")):
-        year = txt_file.stem.split("_", 1)[0]
-        lines = txt_file.read_text(encoding="utf-8", errors="ignore").splitlines()
-        source_pdf = "unknown.pdf"
-        if lines and lines[0].startswith("__SOURCE_PDF__:"):
-            source_pdf = lines[0].split(":", 1)[1].strip()
-            lines = lines[1:]
-
-        grouped[year].extend(parse_questions(lines, year, source_pdf))
+    # Files parse independently; map() keeps results in sorted file order.
+    with ProcessPoolExecutor() as executor:
+        for year, rows in executor.map(parse_file, sorted(TEXT_DIR.glob("*.txt"))):
+            grouped[year].extend(rows)
 
     for year, questions in grouped.items():
         out_path = OUT_DIR / f"{year}.json"
-        out_path.write_text(json.dumps(questions, indent=2, ensure_ascii=False), encoding="utf-8")
+        out_path.write_bytes(orjson.dumps(questions, option=JSON_WRITE_OPTIONS))
 
 
 if __name__ == "__main__":